@@ -21,6 +21,8 @@ class GridConfig:
     output_dir: Path
     max_size: Optional[int] = None
     background_color: str = "white"
+    output_format: str = "jpeg"  # "jpeg" or "webp"
+    quality: int = 85
 
     def __post_init__(self):
         """Validate configuration"""
@@ -32,3 +34,7 @@ class GridConfig:
             raise ValueError("Gap cannot be negative")
         if self.max_size is not None and self.max_size <= 0:
             raise ValueError("Max size must be positive")
+        if self.output_format not in ("jpeg", "webp"):
+            raise ValueError("Output format must be 'jpeg' or 'webp'")
+        if not 1 <= self.quality <= 100:
+            raise ValueError("Quality must be between 1 and 100")
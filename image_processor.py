@@ -1,28 +1,51 @@
+import json
+import os
+from collections import OrderedDict
 from pathlib import Path
 from PIL import Image
+import cv2
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class ImageProcessor:
     """Handles image loading, resizing, and cropping"""
 
+    # LRU of decoded BGR arrays, bounded by total bytes rather than entry
+    # count so a few huge originals can't blow past the budget
+    CACHE_BYTE_BUDGET = 2 * 1024 ** 3
+    _array_cache: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+    _array_cache_bytes = 0
+
     @staticmethod
-    def load_images(input_path: Path) -> List[Path]:
-        """Load image paths from directory, sorted by filename"""
+    def scan_images(input_path: Path) -> List[Tuple[Path, os.stat_result]]:
+        """
+        Scan a directory for images in a single pass, sorted by filename.
+
+        os.scandir batches name, type, and stat into one directory read,
+        so the returned stat results let downstream code (the dimension
+        manifest key) avoid a second stat() per file.
+        """
         if not input_path.is_dir():
             raise ValueError(f"{input_path} is not a directory")
 
         supported_formats = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-        image_paths = [
-            p for p in sorted(input_path.iterdir())
-            if p.suffix.lower() in supported_formats
+        entries = [
+            entry for entry in os.scandir(input_path)
+            if entry.is_file(follow_symlinks=False)
+            and os.path.splitext(entry.name)[1].lower() in supported_formats
         ]
 
-        if not image_paths:
+        if not entries:
             raise ValueError(f"No images found in {input_path}")
 
-        return image_paths
+        entries.sort(key=lambda entry: entry.name)
+        return [(Path(entry.path), entry.stat(follow_symlinks=False)) for entry in entries]
+
+    @staticmethod
+    def load_images(input_path: Path) -> List[Path]:
+        """Load image paths from directory, sorted by filename"""
+        return [path for path, _ in ImageProcessor.scan_images(input_path)]
 
     @staticmethod
     def load_image(image_path: Path) -> Image.Image:
@@ -37,6 +60,91 @@ class ImageProcessor:
             img = img.convert('RGB')
         return img
 
+    # Reduced-decode flags: JPEG decoders scale by 1/2, 1/4, or 1/8 in the
+    # DCT domain, skipping most of the inverse-transform work
+    _REDUCED_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+
+    @staticmethod
+    def decode_reduction(
+        source_size: Tuple[int, int],
+        target_width: int,
+        target_height: int
+    ) -> int:
+        """
+        Largest power-of-two decode reduction that stays at or above the
+        target size, so the subsequent resize never upscales.
+        """
+        src_w, src_h = source_size
+        for factor in (8, 4, 2):
+            if src_w // factor >= target_width and src_h // factor >= target_height:
+                return factor
+        return 1
+
+    @staticmethod
+    def load_image_array(image_path: Path, reduction: int = 1) -> np.ndarray:
+        """
+        Load a single image as a BGR uint8 array via OpenCV.
+
+        A reduction of 2, 4, or 8 decodes at that fraction of the source
+        size (cheap for JPEG, which scales during the decode itself).
+        """
+        arr = cv2.imread(str(image_path), ImageProcessor._REDUCED_FLAGS[reduction])
+        if arr is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+        return arr
+
+    @classmethod
+    def open_cached(cls, image_path: Path, reduction: int = 1) -> np.ndarray:
+        """
+        Load an image array through the decode cache.
+
+        Repeated references to the same source (looping layouts, parameter
+        sweeps within one process) hit the cached array instead of
+        re-decoding. Least-recently-used entries are evicted once the
+        cached arrays exceed CACHE_BYTE_BUDGET. Callers must not mutate
+        the returned array.
+        """
+        key = (str(image_path), reduction)
+        array = cls._array_cache.get(key)
+        if array is not None:
+            cls._array_cache.move_to_end(key)
+            return array
+
+        array = cls.load_image_array(image_path, reduction)
+        cls._array_cache[key] = array
+        cls._array_cache_bytes += array.nbytes
+        while cls._array_cache_bytes > cls.CACHE_BYTE_BUDGET and len(cls._array_cache) > 1:
+            _, evicted = cls._array_cache.popitem(last=False)
+            cls._array_cache_bytes -= evicted.nbytes
+        return array
+
+    @staticmethod
+    def resize_array(
+        array: np.ndarray,
+        width: int,
+        height: int,
+        dst: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Resize an image array to the given dimensions.
+
+        Uses INTER_AREA when downscaling (best quality for shrinking) and
+        INTER_LANCZOS4 when upscaling. If dst is a (height, width, 3)
+        uint8 array it is written in place — OpenCV accepts row-strided
+        views, so a page sub-rectangle can be the destination directly.
+        """
+        src_h, src_w = array.shape[:2]
+        if width < src_w or height < src_h:
+            interpolation = cv2.INTER_AREA
+        else:
+            interpolation = cv2.INTER_LANCZOS4
+        return cv2.resize(array, (width, height), dst=dst, interpolation=interpolation)
+
     @staticmethod
     def resize_and_crop(
         image: Image.Image,
@@ -89,9 +197,85 @@ class ImageProcessor:
         return resized
 
     @staticmethod
-    def get_image_dimensions(image_path: Path) -> Tuple[int, int]:
-        """Get image dimensions without loading full image"""
-        img = Image.open(image_path)
-        dimensions = img.size
-        img.close()
+    def load_dimension_cache(cache_file: Path) -> Dict[str, Tuple[int, int]]:
+        """Load the persistent dimension manifest, or an empty dict if absent/corrupt"""
+        try:
+            with open(cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_dimension_cache(cache_file: Path, cache: Dict[str, Tuple[int, int]]) -> None:
+        """Atomically rewrite the dimension manifest"""
+        tmp_file = cache_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+
+    @staticmethod
+    def _jpeg_dimensions(image_path: Path) -> Optional[Tuple[int, int]]:
+        """
+        Read JPEG dimensions from the SOF marker without decoding.
+
+        Scans markers in the header directly, which is cheaper than
+        instantiating a PIL Image per file. Returns None if the file
+        isn't a well-formed JPEG.
+        """
+        with open(image_path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                # Standalone markers (SOI, TEM, RSTn) carry no length segment
+                if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+                    continue
+                length_bytes = f.read(2)
+                if len(length_bytes) < 2:
+                    return None
+                length = int.from_bytes(length_bytes, "big")
+                # SOF0..SOF15 hold the frame dimensions (DHT/JPG/DAC excluded)
+                if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    data = f.read(5)
+                    if len(data) < 5:
+                        return None
+                    height = int.from_bytes(data[1:3], "big")
+                    width = int.from_bytes(data[3:5], "big")
+                    return (width, height)
+                f.seek(length - 2, 1)
+
+    @staticmethod
+    def get_image_dimensions(
+        image_path: Path,
+        cache: Dict[str, Tuple[int, int]] = None,
+        stat: os.stat_result = None
+    ) -> Tuple[int, int]:
+        """
+        Get image dimensions without loading full image.
+
+        If a cache dict is provided, the result is looked up and stored
+        under a (path, mtime_ns, size) key so re-runs only cost a stat();
+        passing the stat result from a directory scan avoids even that.
+        """
+        key = None
+        if cache is not None:
+            st = stat if stat is not None else os.stat(image_path)
+            key = f"{os.path.abspath(image_path)}:{st.st_mtime_ns}:{st.st_size}"
+            cached = cache.get(key)
+            if cached is not None:
+                return tuple(cached)
+
+        dimensions = None
+        if image_path.suffix.lower() in ('.jpg', '.jpeg'):
+            dimensions = ImageProcessor._jpeg_dimensions(image_path)
+        if dimensions is None:
+            img = Image.open(image_path)
+            dimensions = img.size
+            img.close()
+
+        if key is not None:
+            cache[key] = dimensions
         return dimensions
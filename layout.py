@@ -1,123 +1,175 @@
-from typing import List, Tuple
-from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
 from config import LayoutMode, GridConfig
 
 
-@dataclass
-class ImagePlacement:
-    """Information about how to place an image"""
+class ImagePlacement(NamedTuple):
+    """
+    Information about how to place an image.
+
+    Placements are computed and stored as PLACEMENT_DTYPE record arrays;
+    this is a plain-Python view over one record for external callers.
+    """
     image_idx: int  # Index in original image list
     x: int
     y: int
     width: int
     height: int
 
+    @classmethod
+    def from_record(cls, record) -> "ImagePlacement":
+        """Build from one PLACEMENT_DTYPE record"""
+        return cls(int(record.image_idx), int(record.x), int(record.y),
+                   int(record.width), int(record.height))
+
+
+def _pack_bounds_numpy(cumulative: np.ndarray, gap: int, limit: int) -> np.ndarray:
+    """
+    Find greedy row boundaries from cumulative size-plus-gap sums.
+
+    A row [start, j] fits iff cumulative[j] <= base + limit + gap; every
+    row gets at least one image even if it overflows alone. Returns the
+    row start indices with a trailing sentinel of len(cumulative).
+    """
+    num_images = len(cumulative)
+    bounds = [0]
+    start = 0
+    while start < num_images:
+        base = cumulative[start - 1] if start > 0 else 0
+        end = int(np.searchsorted(cumulative, base + limit + gap, side="right"))
+        end = max(end, start + 1)
+        bounds.append(end)
+        start = end
+    return np.asarray(bounds, dtype=np.int64)
+
+
+try:
+    from numba import njit
+
+    # Same greedy packing as _pack_bounds_numpy, written as a plain loop
+    # with an inline binary search so Numba compiles it to native code;
+    # cache=True persists the compilation across runs
+    @njit(cache=True)
+    def _pack_bounds(cumulative, gap, limit):
+        num_images = cumulative.shape[0]
+        bounds = np.empty(num_images + 1, dtype=np.int64)
+        bounds[0] = 0
+        count = 1
+        start = 0
+        while start < num_images:
+            base = cumulative[start - 1] if start > 0 else 0
+            threshold = base + limit + gap
+            lo, hi = start, num_images
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if cumulative[mid] <= threshold:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            end = lo if lo > start else start + 1
+            bounds[count] = end
+            count += 1
+            start = end
+        return bounds[:count]
+except ImportError:
+    _pack_bounds = _pack_bounds_numpy
+
+
+# Structure-of-arrays record for placements: one row per placed image,
+# filled by whole-column assignment instead of one object per image
+PLACEMENT_DTYPE = np.dtype([
+    ('image_idx', 'i4'),
+    ('x', 'i4'),
+    ('y', 'i4'),
+    ('width', 'i4'),
+    ('height', 'i4'),
+])
+
 
 class LayoutCalculator:
     """Calculates image positions and sizes for justified grid layout"""
 
+    @staticmethod
+    def _pack_rows(scaled_sizes: np.ndarray, gap: int, limit: int) -> List[Tuple[int, int]]:
+        """
+        Greedily partition images into rows (or columns) along one axis.
+
+        An image joins the current row while the row's scaled sizes plus
+        inter-image gaps still fit within limit; every row gets at least
+        one image even if it overflows alone. The boundary search runs as
+        a Numba-compiled loop when numba is installed, or cumulative sums
+        plus searchsorted otherwise — either way O(log N) per row instead
+        of walking image-by-image in Python.
+
+        Returns:
+            List of (start, end) index pairs, one per row
+        """
+        # cumulative[j] = sum of scaled sizes 0..j plus (j+1) gaps
+        cumulative = np.cumsum(scaled_sizes + gap)
+
+        bounds = _pack_bounds(cumulative, gap, limit)
+        return list(zip(bounds[:-1], bounds[1:]))
+
     @staticmethod
     def calculate_layout_horizontal(
         config: GridConfig,
         image_dimensions: List[Tuple[int, int]]
-    ) -> Tuple[List[List[ImagePlacement]], int]:
+    ) -> Tuple[np.recarray, np.ndarray]:
         """
         Calculate layout for horizontal layout (rows).
 
         Algorithm:
         - Fixed row height = (canvas_height - (num_rows-1)*gap) / num_rows
-        - For each row, fit as many images as possible
+        - Scale every image to the row height and pack rows greedily in a
+          single cumulative-sum pass
         - Scale all images in row to same height, adjust width proportionally
         - Fill rows until page is full, then create new page
+
+        Returns:
+            (placements, page_start): one flat PLACEMENT_DTYPE record per
+            image in order, and offsets such that page p is
+            placements[page_start[p]:page_start[p + 1]]
         """
-        pages = []
-        current_page_placements = []
-        current_row_y = 0
-        current_row_idx = 0
-        image_idx = 0
+        if not image_dimensions:
+            return np.recarray(0, dtype=PLACEMENT_DTYPE), np.zeros(1, dtype=np.int64)
 
         fixed_row_height = (
             config.canvas_height - (config.num_splits - 1) * config.gap
         ) // config.num_splits
 
-        while image_idx < len(image_dimensions):
-            # Check if we can add another row to current page
-            if current_row_idx >= config.num_splits:
-                # Page is full, start new page
-                pages.append(current_page_placements)
-                current_page_placements = []
-                current_row_y = 0
-                current_row_idx = 0
-
-            # Collect images for this row
-            row_images = []
-            row_image_indices = []
-            total_width = 0
-
-            while image_idx < len(image_dimensions):
-                img_w, img_h = image_dimensions[image_idx]
-                aspect_ratio = img_w / img_h
-
-                # Calculate width if image is scaled to fixed_row_height
-                scaled_width = int(fixed_row_height * aspect_ratio)
-
-                # Check if remaining width is enough for this image (at least 80% of its scaled width)
-                remaining_width = config.canvas_width - total_width
-                if row_images and remaining_width < 0.8 * scaled_width:
-                    # Not enough remaining space to fit without aggressive squishing
-                    break
-
-                # Check if it fits in the row
-                needed_width = scaled_width + (len(row_images) * config.gap)
-
-                if total_width + needed_width > config.canvas_width and row_images:
-                    # Doesn't fit, start placing this row
-                    break
-
-                row_images.append((img_w, img_h))
-                row_image_indices.append(image_idx)
-                total_width += scaled_width
-                image_idx += 1
-
-            # If no images fit
-            if not row_images:
-                # Ensure we have a valid image to add
-                if image_idx < len(image_dimensions):
-                    # Check if we're in the last row of the page
-                    if current_row_idx >= config.num_splits - 1:
-                        # Last row - move to next page
-                        if current_page_placements:
-                            pages.append(current_page_placements)
-                            current_page_placements = []
-                            current_row_y = 0
-                            current_row_idx = 0
-
-                    # Add image to current or new page (strict order maintained)
-                    row_images.append(image_dimensions[image_idx])
-                    row_image_indices.append(image_idx)
-                    image_idx += 1
-
-            # Place images in this row
-            # Scale all images to fixed height, then adjust widths to fill canvas width
-            row_placements = LayoutCalculator._place_row_horizontal(
-                row_images,
-                row_image_indices,
+        # Widths of all images scaled to the fixed row height
+        wh = np.asarray(image_dimensions, dtype=np.float64)
+        scaled_widths = (fixed_row_height * (wh[:, 0] / wh[:, 1])).astype(np.int64)
+
+        row_bounds = LayoutCalculator._pack_rows(
+            scaled_widths, config.gap, config.canvas_width
+        )
+
+        row_arrays = [
+            LayoutCalculator._place_row_horizontal(
+                image_dimensions[start:end],
+                list(range(start, end)),
                 config.canvas_width,
                 fixed_row_height,
                 config.gap,
                 0,  # x position
-                current_row_y,
+                (row_num % config.num_splits) * (fixed_row_height + config.gap),
                 config.max_size
             )
+            for row_num, (start, end) in enumerate(row_bounds)
+        ]
 
-            current_page_placements.extend(row_placements)
-            current_row_y += fixed_row_height + config.gap
-            current_row_idx += 1
+        placements = np.concatenate(row_arrays).view(np.recarray)
 
-        if current_page_placements:
-            pages.append(current_page_placements)
+        # Each page spans num_splits rows; rows partition images in order,
+        # so a page's first placement index is its first row's start
+        page_start = np.asarray(
+            [row_bounds[i][0] for i in range(0, len(row_bounds), config.num_splits)]
+            + [len(image_dimensions)],
+            dtype=np.int64
+        )
 
-        return pages, len(pages)
+        return placements, page_start
 
     @staticmethod
     def _place_row_horizontal(
@@ -128,151 +180,104 @@ class LayoutCalculator:
         gap: int,
         x_offset: int,
         y_offset: int,
-        max_size: int = None
-    ) -> List[ImagePlacement]:
+        max_size: Optional[int] = None
+    ) -> np.recarray:
         """Place images in a horizontal row with justified alignment"""
-        placements = []
         num_images = len(image_dims)
+        if num_images == 0:
+            return np.recarray(0, dtype=PLACEMENT_DTYPE)
 
         # Calculate total width used by gaps
         total_gap_width = (num_images - 1) * gap if num_images > 1 else 0
         available_width = canvas_width - total_gap_width
 
         # Scale all images to row_height and calculate their widths
-        image_widths = []
-        for w, h in image_dims:
-            aspect_ratio = w / h
-            img_width = int(row_height * aspect_ratio)
-            image_widths.append(img_width)
+        wh = np.asarray(image_dims, dtype=np.float64)
+        image_widths = (row_height * (wh[:, 0] / wh[:, 1])).astype(np.int64)
 
-        total_natural_width = sum(image_widths)
+        total_natural_width = image_widths.sum()
 
         # Calculate scale factor to fill the canvas width
         scale_factor = available_width / total_natural_width if total_natural_width > 0 else 1
 
-        # Place images
-        current_x = x_offset
-        for idx, (w, h) in enumerate(image_dims):
-            final_width = int(image_widths[idx] * scale_factor)
-            final_height = row_height
-
-            # Apply max_size constraint if needed
-            if max_size and final_width > max_size:
-                final_width = max_size
-
-            placement = ImagePlacement(
-                image_idx=indices[idx],
-                x=current_x,
-                y=y_offset,
-                width=final_width,
-                height=final_height
-            )
-            placements.append(placement)
-            current_x += final_width + gap
+        final_widths = (image_widths * scale_factor).astype(np.int64)
+
+        # Apply max_size constraint only when configured; the common
+        # max_size=None case skips the clamp entirely
+        if max_size is not None:
+            final_widths = np.minimum(final_widths, max_size)
 
+        # Cumulative x positions: each image starts after the previous one plus gap
+        xs = x_offset + np.concatenate(([0], np.cumsum(final_widths[:-1] + gap)))
+
+        placements = np.recarray(num_images, dtype=PLACEMENT_DTYPE)
+        placements.image_idx = indices
+        placements.x = xs
+        placements.y = y_offset
+        placements.width = final_widths
+        placements.height = row_height
         return placements
 
     @staticmethod
     def calculate_layout_vertical(
         config: GridConfig,
         image_dimensions: List[Tuple[int, int]]
-    ) -> Tuple[List[List[ImagePlacement]], int]:
+    ) -> Tuple[np.recarray, np.ndarray]:
         """
         Calculate layout for vertical layout (columns).
 
         Algorithm:
         - Fixed column width = (canvas_width - (num_cols-1)*gap) / num_cols
-        - For each column, fit as many images as possible
+        - Scale every image to the column width and pack columns greedily
+          in a single cumulative-sum pass
         - Scale all images in column to same width, adjust height proportionally
         - Fill columns until page is full, then create new page
+
+        Returns:
+            (placements, page_start): one flat PLACEMENT_DTYPE record per
+            image in order, and offsets such that page p is
+            placements[page_start[p]:page_start[p + 1]]
         """
-        pages = []
-        current_page_placements = []
-        current_col_x = 0
-        current_col_idx = 0
-        image_idx = 0
+        if not image_dimensions:
+            return np.recarray(0, dtype=PLACEMENT_DTYPE), np.zeros(1, dtype=np.int64)
 
         fixed_col_width = (
             config.canvas_width - (config.num_splits - 1) * config.gap
         ) // config.num_splits
 
-        while image_idx < len(image_dimensions):
-            # Check if we can add another column to current page
-            if current_col_idx >= config.num_splits:
-                # Page is full, start new page
-                pages.append(current_page_placements)
-                current_page_placements = []
-                current_col_x = 0
-                current_col_idx = 0
-
-            # Collect images for this column
-            col_images = []
-            col_image_indices = []
-            total_height = 0
-
-            while image_idx < len(image_dimensions):
-                img_w, img_h = image_dimensions[image_idx]
-                aspect_ratio = img_w / img_h
-
-                # Calculate height if image is scaled to fixed_col_width
-                scaled_height = int(fixed_col_width / aspect_ratio)
-
-                # Check if remaining height is enough for this image (at least 80% of its scaled height)
-                remaining_height = config.canvas_height - total_height
-                if col_images and remaining_height < 0.8 * scaled_height:
-                    # Not enough remaining space to fit without aggressive squishing
-                    break
-
-                # Check if it fits in the column
-                needed_height = scaled_height + (len(col_images) * config.gap)
-
-                if total_height + needed_height > config.canvas_height and col_images:
-                    # Doesn't fit, start placing this column
-                    break
-
-                col_images.append((img_w, img_h))
-                col_image_indices.append(image_idx)
-                total_height += scaled_height
-                image_idx += 1
-
-            # If no images fit
-            if not col_images:
-                # Ensure we have a valid image to add
-                if image_idx < len(image_dimensions):
-                    # Check if we're in the last column of the page
-                    if current_col_idx >= config.num_splits - 1:
-                        # Last column - move to next page
-                        if current_page_placements:
-                            pages.append(current_page_placements)
-                            current_page_placements = []
-                            current_col_x = 0
-                            current_col_idx = 0
-
-                    # Add image to current or new page (strict order maintained)
-                    col_images.append(image_dimensions[image_idx])
-                    col_image_indices.append(image_idx)
-                    image_idx += 1
-
-            # Place images in this column
-            col_placements = LayoutCalculator._place_col_vertical(
-                col_images,
-                col_image_indices,
+        # Heights of all images scaled to the fixed column width
+        wh = np.asarray(image_dimensions, dtype=np.float64)
+        scaled_heights = (fixed_col_width / (wh[:, 0] / wh[:, 1])).astype(np.int64)
+
+        col_bounds = LayoutCalculator._pack_rows(
+            scaled_heights, config.gap, config.canvas_height
+        )
+
+        col_arrays = [
+            LayoutCalculator._place_col_vertical(
+                image_dimensions[start:end],
+                list(range(start, end)),
                 fixed_col_width,
                 config.canvas_height,
                 config.gap,
-                current_col_x,
+                (col_num % config.num_splits) * (fixed_col_width + config.gap),
                 0,  # y position
                 config.max_size
             )
+            for col_num, (start, end) in enumerate(col_bounds)
+        ]
 
-            current_page_placements.extend(col_placements)
-            current_col_x += fixed_col_width + config.gap
-            current_col_idx += 1
+        placements = np.concatenate(col_arrays).view(np.recarray)
 
-        if current_page_placements:
-            pages.append(current_page_placements)
+        # Each page spans num_splits columns; columns partition images in
+        # order, so a page's first placement index is its first column's start
+        page_start = np.asarray(
+            [col_bounds[i][0] for i in range(0, len(col_bounds), config.num_splits)]
+            + [len(image_dimensions)],
+            dtype=np.int64
+        )
 
-        return pages, len(pages)
+        return placements, page_start
 
     @staticmethod
     def _place_col_vertical(
@@ -283,57 +288,55 @@ class LayoutCalculator:
         gap: int,
         x_offset: int,
         y_offset: int,
-        max_size: int = None
-    ) -> List[ImagePlacement]:
+        max_size: Optional[int] = None
+    ) -> np.recarray:
         """Place images in a vertical column with justified alignment"""
-        placements = []
         num_images = len(image_dims)
+        if num_images == 0:
+            return np.recarray(0, dtype=PLACEMENT_DTYPE)
 
         # Calculate total height used by gaps
         total_gap_height = (num_images - 1) * gap if num_images > 1 else 0
         available_height = canvas_height - total_gap_height
 
         # Scale all images to col_width and calculate their heights
-        image_heights = []
-        for w, h in image_dims:
-            aspect_ratio = w / h
-            img_height = int(col_width / aspect_ratio)
-            image_heights.append(img_height)
+        wh = np.asarray(image_dims, dtype=np.float64)
+        image_heights = (col_width / (wh[:, 0] / wh[:, 1])).astype(np.int64)
 
-        total_natural_height = sum(image_heights)
+        total_natural_height = image_heights.sum()
 
         # Calculate scale factor to fill the canvas height
         scale_factor = available_height / total_natural_height if total_natural_height > 0 else 1
 
-        # Place images
-        current_y = y_offset
-        for idx, (w, h) in enumerate(image_dims):
-            final_width = col_width
-            final_height = int(image_heights[idx] * scale_factor)
-
-            # Apply max_size constraint if needed
-            if max_size and final_height > max_size:
-                final_height = max_size
-
-            placement = ImagePlacement(
-                image_idx=indices[idx],
-                x=x_offset,
-                y=current_y,
-                width=final_width,
-                height=final_height
-            )
-            placements.append(placement)
-            current_y += final_height + gap
+        final_heights = (image_heights * scale_factor).astype(np.int64)
+
+        # Apply max_size constraint only when configured; the common
+        # max_size=None case skips the clamp entirely
+        if max_size is not None:
+            final_heights = np.minimum(final_heights, max_size)
 
+        # Cumulative y positions: each image starts after the previous one plus gap
+        ys = y_offset + np.concatenate(([0], np.cumsum(final_heights[:-1] + gap)))
+
+        placements = np.recarray(num_images, dtype=PLACEMENT_DTYPE)
+        placements.image_idx = indices
+        placements.x = x_offset
+        placements.y = ys
+        placements.width = col_width
+        placements.height = final_heights
         return placements
 
     @staticmethod
     def calculate_layout(
         config: GridConfig,
         image_dimensions: List[Tuple[int, int]]
-    ) -> Tuple[List[List[ImagePlacement]], int]:
+    ) -> Tuple[np.recarray, np.ndarray]:
         """
         Calculate layout for images based on layout mode.
+
+        Returns:
+            (placements, page_start): one flat PLACEMENT_DTYPE record per
+            image, and offsets delimiting each page's slice
         """
         if config.layout == LayoutMode.HORIZONTAL:
             return LayoutCalculator.calculate_layout_horizontal(config, image_dimensions)
@@ -1,13 +1,31 @@
 import argparse
+import os
 import sys
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+from multiprocessing import shared_memory
 from pathlib import Path
-from PIL import Image
-from typing import List, Tuple, Union
+import cv2
+import numpy as np
+from typing import Iterable, Iterator, List, Tuple, Union
 
 from config import GridConfig, LayoutMode
 from image_processor import ImageProcessor
-from video_processor import VideoProcessor
-from layout import LayoutCalculator, ImagePlacement
+from video_processor import VideoProcessor, VideoFrameSource
+from layout import LayoutCalculator
+
+# Optional libjpeg-turbo bindings: encodes the page buffer directly to
+# JPEG bytes, skipping cv2's Mat round trip. Falls back to cv2.imwrite
+# (whose bundled libjpeg-turbo is still SIMD-accelerated) when absent.
+try:
+    from turbojpeg import TJSAMP_420, TurboJPEG
+    _turbojpeg = TurboJPEG()
+except Exception:
+    _turbojpeg = None
+
+# Output file extension per supported page format
+PAGE_EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp"}
 
 
 def parse_arguments():
@@ -76,24 +94,53 @@ def parse_arguments():
         help="Output directory for generated pages"
     )
 
+    parser.add_argument(
+        "-f", "--format",
+        choices=["jpeg", "webp"],
+        default="jpeg",
+        help="Output page format (default: jpeg)"
+    )
+
+    parser.add_argument(
+        "-q", "--quality",
+        type=int,
+        default=85,
+        help="Output encode quality 1-100 (default: 85)"
+    )
+
     return parser.parse_args()
 
 
-def load_images_or_video(input_path: Path, config: GridConfig) -> Tuple[Union[List[Path], List[Image.Image]], List[Tuple[int, int]]]:
+def load_images_or_video(input_path: Path, config: GridConfig) -> Tuple[Union[List[Path], VideoFrameSource], List[Tuple[int, int]]]:
     """
     Load images from directory or video file.
 
     Returns:
         For directories: (list of image paths, list of (width, height) tuples)
-        For videos: (list of PIL Images, list of (width, height) tuples)
+        For videos: (lazy VideoFrameSource, list of (width, height) tuples)
     """
     if input_path.is_dir():
-        # Load image paths from directory (don't load images yet to avoid too many open files)
-        image_paths = ImageProcessor.load_images(input_path)
-        dimensions = []
-        for img_path in image_paths:
-            dim = ImageProcessor.get_image_dimensions(img_path)
-            dimensions.append(dim)
+        # Scan paths and stat info in one pass (don't load images yet to
+        # avoid too many open files)
+        entries = ImageProcessor.scan_images(input_path)
+        image_paths = [path for path, _ in entries]
+
+        # Probe dimensions through the persistent manifest so re-runs only
+        # cost the directory scan; the scan's stat feeds the cache key
+        cache_file = config.output_dir / "_dim_cache.json"
+        dim_cache = ImageProcessor.load_dimension_cache(cache_file)
+
+        def probe(entry):
+            path, stat = entry
+            return ImageProcessor.get_image_dimensions(path, dim_cache, stat)
+
+        # Probing is pure I/O (small header read), so overlap it across
+        # threads; map preserves input order
+        with ThreadPoolExecutor(max_workers=min(32, len(entries))) as executor:
+            dimensions = list(executor.map(probe, entries))
+
+        config.output_dir.mkdir(parents=True, exist_ok=True)
+        ImageProcessor.save_dimension_cache(cache_file, dim_cache)
         return image_paths, dimensions
     elif input_path.is_file():
         # Load from video
@@ -111,18 +158,20 @@ def load_images_or_video(input_path: Path, config: GridConfig) -> Tuple[Union[Li
         num_frames_to_extract = min(num_frames_needed, total_frames)
         print(f"Extracting {num_frames_to_extract} frames (out of {total_frames} available)")
 
-        # Extract only the needed frames from video
-        frames = VideoProcessor.extract_frames(input_path, num_frames_to_extract)
-        dimensions = [(frame.size[0], frame.size[1]) for frame in frames]
+        # Defer decoding: hand back a lazy source over the sampled indices
+        # so frames never all live in memory at once
+        frame_indices = VideoProcessor.sample_indices(total_frames, num_frames_to_extract)
+        source = VideoFrameSource(input_path, frame_indices, first_frame_dims)
+        dimensions = [first_frame_dims] * len(frame_indices)
 
-        return frames, dimensions
+        return source, dimensions
     else:
         raise ValueError(f"{input_path} is neither a directory nor a file")
 
 
 def process_images(
     config: GridConfig,
-    images: List[Image.Image],
+    images: Union[List[Path], VideoFrameSource],
     dimensions: List[Tuple[int, int]]
 ) -> None:
     """
@@ -131,86 +180,323 @@ def process_images(
     pass  # No pre-processing needed; will resize during placement
 
 
-def generate_pages(
-    config: GridConfig,
-    images: Union[List[Path], List[Image.Image]],
-    dimensions: List[Tuple[int, int]]
-) -> None:
-    """Generate and save collage pages"""
-    config.output_dir.mkdir(parents=True, exist_ok=True)
+def render_page(args: Tuple) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Render a single collage page and save it to disk.
 
-    # Calculate layout
-    pages, total_pages = LayoutCalculator.calculate_layout(config, dimensions)
+    Runs in a worker process, so sources are plain paths or shared-memory
+    references rather than live image objects. All pixel work stays on
+    BGR uint8 arrays: OpenCV decode, cv2.resize, slice-assignment blit,
+    and cv2.imwrite encode.
 
-    # Determine if images are paths (directory) or Image objects (video)
-    is_image_path = isinstance(images[0], Path) if images else False
+    Args:
+        args: (page_num, page_placements, sources, canvas_width, canvas_height,
+               background_color, output_dir, is_image_path, output_format,
+               quality) where sources maps image_idx to a
+               (path, decode_reduction) tuple (directory input) or is a
+               (shm_name, frame_table) pair locating raw BGR frames in a
+               shared-memory block (video input)
 
-    # Track layout for output file
-    layout_info = []
+    Returns:
+        (page_num, page_filename, page_images) where page_images is list of
+        (index, name) tuples
+    """
+    (page_num, page_placements, sources, canvas_width, canvas_height,
+     background_color, output_dir, is_image_path, output_format, quality) = args
+
+    # Attach the page's frame block; frames are read straight out of
+    # shared memory with no per-frame pickling or copying
+    shm = None
+    if not is_image_path:
+        shm_name, frame_table = sources
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        except TypeError:  # track parameter requires Python 3.13+
+            shm = shared_memory.SharedMemory(name=shm_name)
+        sources = frame_table
+
+    # Create blank page with background color (BGR order for OpenCV);
+    # allocate once and broadcast-fill rather than composing through PIL
+    page = np.empty((canvas_height, canvas_width, 3), dtype=np.uint8)
+    page[...] = background_color[::-1]
+
+    # Track images on this page
+    page_images = []
+
+    # Place images in source order: repeated sources land back-to-back so
+    # the decode cache stays hot, and file reads go sequentially through
+    # the directory (pastes are position-addressed, so order is free)
+    order = np.argsort(page_placements.image_idx, kind="stable")
+    sorted_placements = page_placements[order]
+
+    # Place images on page
+    img = None
+    for placement in sorted_placements:
+        img_idx = placement.image_idx
+
+        if img_idx not in sources:
+            continue
+
+        # Decode image if it's a path, otherwise map the frame out of shared memory
+        if is_image_path:
+            path, reduction = sources[img_idx]
+            img = ImageProcessor.open_cached(path, reduction)
+            image_name = path.name
+        else:
+            shape, offset = sources[img_idx]
+            img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            image_name = f"frame_{img_idx:03d}"
+
+        page_images.append((img_idx, image_name))
+
+        # Resize straight into the page sub-rectangle, skipping the
+        # intermediate buffer and its copy
+        view = page[placement.y:placement.y + placement.height,
+                    placement.x:placement.x + placement.width]
+        if view.shape[:2] == (placement.height, placement.width):
+            ImageProcessor.resize_array(img, placement.width, placement.height, dst=view)
+        else:
+            # Placement clipped at the canvas edge (PIL's paste did this
+            # implicitly); a wrong-sized dst would make cv2 reallocate
+            resized = ImageProcessor.resize_array(img, placement.width, placement.height)
+            view[:] = resized[:view.shape[0], :view.shape[1]]
+
+    # Drop the last frame view before detaching; the block itself is
+    # unlinked by the parent once this page's future completes
+    img = None
+    if shm is not None:
+        shm.close()
+
+    # Save page
+    output_file = output_dir / f"page_{page_num:03d}{PAGE_EXTENSIONS[output_format]}"
+    save_page(page, output_file, output_format, quality)
+
+    # Release the canvas before returning so memory dips between pages
+    del page
+    print(f"Generated: {output_file}")
+
+    return page_num, output_file.name, page_images
+
+
+def save_page(
+    page: "np.ndarray",
+    output_file: Path,
+    output_format: str = "jpeg",
+    quality: int = 85
+) -> None:
+    """
+    Encode a BGR page buffer to the requested format.
 
-    # Generate each page
-    for page_num, page_placements in enumerate(pages):
-        # Create blank page with background color
-        page = Image.new("RGB", (config.canvas_width, config.canvas_height), config.background_color)
+    JPEG encodes with 4:2:0 chroma subsampling — at screen viewing
+    distances the quality difference is negligible for collages, and both
+    encode time and file size drop substantially versus 4:4:4. JPEG uses
+    TurboJPEG when installed, cv2.imwrite otherwise.
+    """
+    if output_format == "webp":
+        cv2.imwrite(str(output_file), page, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    elif _turbojpeg is not None:
+        with open(output_file, "wb") as f:
+            f.write(_turbojpeg.encode(page, quality=quality, jpeg_subsample=TJSAMP_420))
+    else:
+        cv2.imwrite(str(output_file), page, [
+            cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+        ])
 
-        # Track images on this page
-        page_images = []
 
-        # Place images on page
+def _image_job_args(
+    config: GridConfig,
+    image_paths: List[Path],
+    dimensions: List[Tuple[int, int]],
+    pages: List[np.recarray]
+) -> Iterator[Tuple]:
+    """
+    Yield one render_page job per page for directory input.
+
+    Each source carries the largest power-of-two decode reduction that
+    still covers the image's placement, so workers can decode JPEGs at a
+    fraction of full size instead of decoding and then shrinking.
+    """
+    for page_num, page_placements in enumerate(pages):
+        sources = {}
         for placement in page_placements:
             img_idx = placement.image_idx
-
-            if img_idx >= len(images):
+            if img_idx >= len(image_paths):
                 continue
-
-            # Load image if it's a path, otherwise use the Image object
-            if is_image_path:
-                img = ImageProcessor.load_image(images[img_idx])
-                image_name = images[img_idx].name
+            reduction = ImageProcessor.decode_reduction(
+                dimensions[img_idx], placement.width, placement.height
+            )
+            if img_idx in sources:
+                # Same image placed twice: decode at the finer of the two
+                sources[img_idx] = (image_paths[img_idx],
+                                    min(reduction, sources[img_idx][1]))
             else:
-                img = images[img_idx]
-                image_name = f"frame_{img_idx:03d}"
+                sources[img_idx] = (image_paths[img_idx], reduction)
+        yield (
+            page_num,
+            page_placements,
+            sources,
+            config.canvas_width,
+            config.canvas_height,
+            config.background_color,
+            config.output_dir,
+            True,
+            config.output_format,
+            config.quality,
+        ), None
+
+
+def _video_job_args(
+    config: GridConfig,
+    source: VideoFrameSource,
+    pages: List[np.recarray]
+) -> Iterator[Tuple]:
+    """
+    Yield one render_page job per page for video input.
 
-            page_images.append((img_idx, image_name))
+    Frames are pulled lazily from the source in sample order — placements
+    reference frames in increasing index order across pages — and
+    published once into a per-page shared-memory block, so workers attach
+    by name instead of receiving gigabytes of pickled pixels over IPC.
+    Each job comes with a parent-side cleanup that unlinks its block.
+    """
+    # Frames stay in OpenCV's native BGR from decode to page encode; the
+    # RGB detour only existed for the old PIL pipeline
+    frame_iter = source.iter_frames(keep_bgr=True)
+    for page_num, page_placements in enumerate(pages):
+        needed = sorted({
+            placement.image_idx
+            for placement in page_placements
+            if placement.image_idx < len(source)
+        })
+
+        frames = {}
+        for want in needed:
+            for idx, frame in frame_iter:
+                if idx == want:
+                    frames[want] = frame
+                    break
+
+        # Concatenate this page's frames into one shared-memory block;
+        # the table records each frame's (shape, byte offset)
+        total_bytes = sum(frame.nbytes for frame in frames.values())
+        shm = shared_memory.SharedMemory(create=True, size=max(total_bytes, 1))
+        frame_table = {}
+        offset = 0
+        for idx in needed:
+            frame = frames.pop(idx)
+            block = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            block[:] = frame
+            frame_table[idx] = (frame.shape, offset)
+            offset += frame.nbytes
+        del block, frame
+
+        def cleanup(shm=shm):
+            shm.close()
+            shm.unlink()
+
+        yield (
+            page_num,
+            page_placements,
+            (shm.name, frame_table),
+            config.canvas_width,
+            config.canvas_height,
+            config.background_color,
+            config.output_dir,
+            False,
+            config.output_format,
+            config.quality,
+        ), cleanup
+
+
+def _render_pages(jobs: Iterable[Tuple]) -> List[Tuple[int, str, List[Tuple[int, str]]]]:
+    """
+    Render page jobs on the process pool with a bounded submission window.
 
-            # Resize image to placement dimensions
-            resized = img.resize((placement.width, placement.height), Image.Resampling.LANCZOS)
+    Keeping at most ~2x workers jobs in flight caps the frame data held
+    for pending pages, so streaming inputs stay streamed. jobs yields
+    (args, cleanup) pairs; a non-None cleanup runs in the parent after
+    that page's future finishes (e.g. unlinking its shared-memory block).
+    """
+    max_workers = os.cpu_count() or 1
+    layout_info = []
+    pending = {}
+
+    def finish(future):
+        try:
+            layout_info.append(future.result())
+        finally:
+            cleanup = pending.pop(future)
+            if cleanup is not None:
+                cleanup()
 
-            # Paste onto page
-            page.paste(resized, (placement.x, placement.y))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for args, cleanup in jobs:
+                pending[executor.submit(render_page, args)] = cleanup
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(set(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future)
+            for future in list(pending):
+                finish(future)
+    finally:
+        # On error, release blocks whose pages never completed
+        for cleanup in pending.values():
+            if cleanup is not None:
+                cleanup()
+
+    # Completion order is arbitrary; restore page order for the layout file
+    layout_info.sort(key=lambda entry: entry[0])
+    return layout_info
 
-            # Close loaded image to free file handle
-            if is_image_path:
-                img.close()
 
-        # Save page
-        output_file = config.output_dir / f"page_{page_num:03d}.jpg"
-        page.save(output_file, "JPEG", quality=95)
-        print(f"Generated: {output_file}")
+def generate_pages(
+    config: GridConfig,
+    images: Union[List[Path], VideoFrameSource],
+    dimensions: List[Tuple[int, int]]
+) -> None:
+    """Generate and save collage pages in parallel, one page per worker"""
+    config.output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Calculate layout: one flat placement array plus page start offsets;
+    # per-page views are slices, so no per-page copies are made
+    placements, page_start = LayoutCalculator.calculate_layout(config, dimensions)
+    pages = [
+        placements[page_start[i]:page_start[i + 1]]
+        for i in range(len(page_start) - 1)
+    ]
+
+    # Build one job per page; pages are independent, so rendering is CPU-bound
+    # work (decode, resize, JPEG encode) that scales across processes
+    if isinstance(images, VideoFrameSource):
+        job_args = _video_job_args(config, images, pages)
+    else:
+        job_args = _image_job_args(config, images, dimensions, pages)
 
-        # Record layout for this page
-        layout_info.append((page_num, page_images))
+    layout_info = _render_pages(job_args)
 
     # Write layout information to file
     write_layout_file(config.output_dir, layout_info)
 
 
-def write_layout_file(output_dir: Path, layout_info: List[Tuple[int, List[Tuple[int, str]]]]) -> None:
+def write_layout_file(output_dir: Path, layout_info: List[Tuple[int, str, List[Tuple[int, str]]]]) -> None:
     """
     Write image layout information to image_layout.txt file.
     Includes image indices to verify strict ordering.
 
     Args:
         output_dir: Directory to save the layout file
-        layout_info: List of (page_num, page_images) tuples where page_images is list of (index, name) tuples
+        layout_info: List of (page_num, page_filename, page_images) tuples
+            where page_images is list of (index, name) tuples
     """
     layout_file = output_dir / "image_layout.txt"
 
     with open(layout_file, "w") as f:
-        for page_num, page_images in layout_info:
+        for page_num, page_filename, page_images in layout_info:
             # Write page with image indices and names to verify strict ordering
             images_info = [f"[{idx}] {name}" for idx, name in page_images]
-            f.write(f"page_{page_num:03d}.jpg: {', '.join(images_info)}\n")
+            f.write(f"{page_filename}: {', '.join(images_info)}\n")
 
     print(f"Layout information written to: {layout_file}")
 
@@ -230,7 +516,9 @@ def main():
             gap=args.gap,
             output_dir=args.output,
             max_size=args.max_size,
-            background_color=tuple(args.bg_color)
+            background_color=tuple(args.bg_color),
+            output_format=args.format,
+            quality=args.quality
         )
 
         print(f"Loading images from {config.input_path}...")
@@ -1,12 +1,61 @@
 from pathlib import Path
 from PIL import Image
 import cv2
-from typing import List, Tuple
+import numpy as np
+from typing import Iterator, List, Tuple
+
+
+class VideoFrameSource:
+    """
+    Lazy handle on the sampled frames of a video.
+
+    Holds only the video path and the frame indices to sample; frames are
+    decoded one at a time through iter_frames, so peak memory stays at a
+    single frame instead of the whole sample.
+    """
+
+    def __init__(self, video_path: Path, frame_indices: List[int], frame_size: Tuple[int, int]):
+        self.video_path = video_path
+        self.frame_indices = frame_indices
+        self.frame_size = frame_size  # (width, height)
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    def iter_frames(self, keep_bgr: bool = False) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (sample_index, frame array) pairs in sample order"""
+        return VideoProcessor.iter_frames(self.video_path, self.frame_indices, keep_bgr)
 
 
 class VideoProcessor:
     """Handles video frame extraction"""
 
+    @staticmethod
+    def open_capture(video_path: Path) -> cv2.VideoCapture:
+        """
+        Open a video, preferring hardware-accelerated decode.
+
+        Requests any available acceleration (NVDEC, VA-API, ...) from the
+        FFmpeg backend; builds without hardware support silently decode on
+        the CPU as before.
+        """
+        try:
+            cap = cv2.VideoCapture(
+                str(video_path),
+                cv2.CAP_FFMPEG,
+                [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            )
+            if cap.isOpened():
+                return cap
+        except cv2.error:
+            pass
+
+        # Fall back to the default backend with software decode
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+        return cap
+
     @staticmethod
     def get_video_info(video_path: Path) -> Tuple[int, int, int, float]:
         """
@@ -15,9 +64,7 @@ class VideoProcessor:
         Returns:
             (total_frames, width, height, fps)
         """
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        cap = VideoProcessor.open_capture(video_path)
 
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -27,6 +74,59 @@ class VideoProcessor:
         cap.release()
         return total_frames, width, height, fps
 
+    @staticmethod
+    def sample_indices(total_frames: int, num_frames: int) -> List[int]:
+        """Calculate evenly spaced frame indices for sampling"""
+        if num_frames > total_frames:
+            raise ValueError(
+                f"Requested {num_frames} frames but video has only {total_frames}"
+            )
+        return [
+            int(i * total_frames / num_frames)
+            for i in range(num_frames)
+        ]
+
+    @staticmethod
+    def iter_frames(
+        video_path: Path,
+        frame_indices: List[int],
+        keep_bgr: bool = False
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Lazily yield sampled frames as (sample_index, array) pairs.
+
+        Seeks to each wanted frame instead of decoding every frame in
+        between, and holds only one decoded frame at a time so peak
+        memory is independent of the sample count. Frames come back RGB
+        by default; keep_bgr skips the color swap for consumers that
+        work in OpenCV's native BGR order.
+        """
+        cap = VideoProcessor.open_capture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+
+        try:
+            for i, idx in enumerate(frame_indices):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                ret, frame = cap.read()
+
+                if not ret and fps > 0:
+                    # Some streams seek more reliably by timestamp than by frame number
+                    cap.set(cv2.CAP_PROP_POS_MSEC, idx * 1000.0 / fps)
+                    ret, frame = cap.read()
+
+                if not ret:
+                    raise ValueError(
+                        f"Cannot read frame {idx} from {video_path}"
+                    )
+
+                if keep_bgr:
+                    yield i, frame
+                else:
+                    # Convert BGR to RGB
+                    yield i, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        finally:
+            cap.release()
+
     @staticmethod
     def extract_frames(
         video_path: Path,
@@ -44,54 +144,21 @@ class VideoProcessor:
         Returns:
             List of PIL Image objects
         """
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
-
+        cap = VideoProcessor.open_capture(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        if num_frames > total_frames:
-            raise ValueError(
-                f"Requested {num_frames} frames but video has only {total_frames}"
-            )
-
-        # Calculate frame indices to extract (evenly spaced)
-        frame_indices = [
-            int(i * total_frames / num_frames)
-            for i in range(num_frames)
-        ]
-
-        frames = []
-        frame_count = 0
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            if frame_count in frame_indices:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(frame_rgb)
-                frames.append(pil_image)
-
-            frame_count += 1
-
         cap.release()
 
-        if len(frames) != num_frames:
-            raise ValueError(
-                f"Expected {num_frames} frames but extracted {len(frames)}"
-            )
+        frame_indices = VideoProcessor.sample_indices(total_frames, num_frames)
 
-        return frames
+        return [
+            Image.fromarray(frame_rgb)
+            for _, frame_rgb in VideoProcessor.iter_frames(video_path, frame_indices)
+        ]
 
     @staticmethod
     def get_first_frame(video_path: Path) -> Image.Image:
         """Extract the first frame from video"""
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        cap = VideoProcessor.open_capture(video_path)
 
         ret, frame = cap.read()
         cap.release()